@@ -1,94 +1,127 @@
-from typing import TYPE_CHECKING, Dict, List
+import heapq
+from collections import Counter
+from itertools import chain
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 if TYPE_CHECKING:
     from core.recommender import RecommendationEngine
 
-from utils.sorting import bubble_sort_map_by_values
+from core.item import Item
 
 class ContentBasedRecommender:
     """Class for implementing content-based recommendation strategies"""
 
-    def __init__(self, engine: RecommendationEngine) -> None:
+    def __init__(self, engine: "RecommendationEngine") -> None:
         """Initializing the content based recommendation object"""
         self.engine = engine
         self.category_index: Dict[str, List[str]] = {}
         self.tag_index: Dict[str, List[str]] = {}
+        self.preference_cache: Dict[str, Tuple[int, Dict[str, float]]] = {}
+
+        # Category and tags each item ID was last indexed under, so re-indexing removes exactly those entries
+        self._indexed_categories: Dict[str, str] = {}
+        self._indexed_tags: Dict[str, Tuple[str, ...]] = {}
 
     def build_category_index(self) -> None:
         """Method to build category index from the existing Item store in the Engine object"""
+        # Re-initializing the index since build is always a method from scratch
+        self.category_index = {}
+        self._indexed_categories = {}
+
         # Iterating through the elements of the item store map
         for item_id, item in self.engine.item_store.items():
-            # Checking if the category already exists
-            if item.category not in self.category_index:
-                self.category_index[item.category] = []
-
-            # Adding the item ID since build is always a method from scratch
-            self.category_index[item.category].append(item_id)
+            # Adding the item ID to the category index, creating the bucket on first use in the same probe
+            self.category_index.setdefault(item.category, []).append(item_id)
+            self._indexed_categories[item_id] = item.category
 
     def build_tag_index(self) -> None:
         """Method to build tag index from the existing Item store in the Engine object"""
+        # Re-initializing the index since build is always a method from scratch
+        self.tag_index = {}
+        self._indexed_tags = {}
+
         # Iterating through the elements of the item store map
         for item_id, item in self.engine.item_store.items():
             # Iterating through the tags present for that particular item
             if item.tags:
                 for tag in item.tags:
-                    if tag not in self.tag_index:
-                        # Initializing empty list for first time tags
-                        self.tag_index[tag] = []
+                    # Adding the item ID to the tag index, creating the bucket on first use in the same probe
+                    self.tag_index.setdefault(tag, []).append(item_id)
+            self._indexed_tags[item_id] = tuple(item.tags or ())
+
+    def index_item(self, item: Item) -> bool:
+        """Method to add a single stored item to the category and tag indices, returning True when an indexed item's features changed"""
+        # Snapshotting the features being indexed, an item edited in place must not change what gets removed later
+        item_id = item.item_id
+        category = item.category
+        tags = tuple(item.tags or ())
+
+        # Re-adding an existing item ID must not list it twice or leave it under its old category and tags
+        if item_id in self._indexed_categories:
+            # Nothing to do when the category and tags did not change since it was indexed
+            if self._indexed_categories[item_id] == category and self._indexed_tags[item_id] == tags:
+                return False
+
+            # Removing the item ID from the buckets it was actually indexed under
+            self.category_index[self._indexed_categories[item_id]].remove(item_id)
+            for tag in self._indexed_tags[item_id]:
+                self.tag_index[tag].remove(item_id)
+            features_changed = True
+        else:
+            # A new item cannot change any preferences since nobody could have rated it yet
+            features_changed = False
+
+        # Adding the item ID to its category bucket
+        self.category_index.setdefault(category, []).append(item_id)
+        self._indexed_categories[item_id] = category
 
-                    # adding the item ID to the tag index
-                    self.tag_index[tag].append(item_id)
+        # Adding the item ID to each of its tag buckets
+        for tag in tags:
+            self.tag_index.setdefault(tag, []).append(item_id)
+        self._indexed_tags[item_id] = tags
+
+        # Returning whether an already indexed item moved to a different category or tags
+        return features_changed
 
     def extract_user_preferences(self, user_id: str) -> Dict:
         """Method to score the user preferences"""
         # Extracting the ratings for that particular user ID
         user_rating_map = self.engine.user_rating_store.get(user_id)
 
-        # If user rating map is present
-        if user_rating_map:
-            # Initializing total items and feature scores tracking
-            total_items = 0
-            feature_map = {}
-
-            # Iterating through existing user ratings
-            for item_id, rating in user_rating_map.items():
-                # Only considering high ratings
-                if rating > 4.0:
-                    # Retrieving item object
-                    item_object = self.engine.get_item(item_id)
-
-                    # Checking if item category is already present in the feature map
-                    if item_object.category not in feature_map:
-                        feature_map[item_object.category] = 1
-                    else:
-                        feature_map[item_object.category] = feature_map[item_object.category] + 1
-
-                    # Iterating through the tags of the object
-                    for tag in item_object.tags:
-                        # Checking if the tag already exists in the feature map
-                        if tag not in feature_map:
-                            feature_map[tag] = 1
-                        else:
-                            feature_map[tag] = feature_map[tag] + 1
-
-                    # Incrementing total number of items
-                    total_items = total_items + 1
-
-            # Initializing hash map for calculating user preferences
-            user_preference_map = {}
-
-            # Iterating through the feature score tracking map
-            for feature_id, number_of_ratings in feature_map.items():
-                # Calculating weight of the feature
-                feature_weight = number_of_ratings/total_items
-                user_preference_map[feature_id] = feature_weight
-
-            # Returning final preference weights
-            return user_preference_map
-
         # In case user ratings are not present
-        else:
+        if not user_rating_map:
             return None
+
+        # Returning the cached preferences if the user's ratings haven't changed since they were computed
+        rating_version = self.engine.user_rating_version.get(user_id, 0)
+        cached_preferences = self.preference_cache.get(user_id)
+        if cached_preferences and cached_preferences[0] == rating_version:
+            return cached_preferences[1]
+
+        # Gathering every highly rated item in one pass straight from the item store
+        item_store = self.engine.item_store
+        liked_items = [item_store[item_id] for item_id, rating in user_rating_map.items() if rating > 4.0]
+        total_items = len(liked_items)
+
+        # Counting the categories and then all tags of the liked items with two bulk counter updates
+        feature_map = Counter(item.category for item in liked_items)
+        feature_map.update(chain.from_iterable(item.tags for item in liked_items if item.tags))
+
+        # Initializing hash map for calculating user preferences
+        user_preference_map = {}
+
+        # Iterating through the feature score tracking map
+        for feature_id, number_of_ratings in feature_map.items():
+            # Calculating weight of the feature
+            feature_weight = number_of_ratings/total_items
+            user_preference_map[feature_id] = feature_weight
+
+        # Caching the preference weights against the rating version they were computed from
+        self.preference_cache[user_id] = (rating_version, user_preference_map)
+
+        # Returning final preference weights
+        return user_preference_map
         
     def recommend(
         self,
@@ -107,47 +140,24 @@ class ContentBasedRecommender:
         user_rated_items = self.engine.user_rating_store.get(user_id, {})
 
         # Initializing a map for candidate items and their scores
+        # Only items matching at least one preferred feature are ever added, so unmatched items cost nothing
         candidate_score_map = {}
 
-        # Iterating through the store of items
-        for item_id in self.engine.item_store.keys():
-            # Initializing the item in the candidate score map
-            if item_id not in user_rated_items:
-                candidate_score_map[item_id] = 0.0
+        # Scoring through the category and tag indices so only the user's preferred features are visited
+        # This is a sparse item-feature matrix times the preference vector, one posting list per feature
+        for feature_id, feature_weight in user_preferences_map.items():
+            # Items in a preferred category get the category weight
+            for item_id in self.category_index.get(feature_id, []):
+                if item_id not in user_rated_items:
+                    candidate_score_map[item_id] = candidate_score_map.get(item_id, 0.0) + (feature_weight * 10)
 
-        # Iterating through the candidate items
-        for candidate_item_id in candidate_score_map.keys():
-            # Retrieving the item object
-            item = self.engine.item_store.get(candidate_item_id)
+            # Items carrying a preferred tag get the tag weight
+            for item_id in self.tag_index.get(feature_id, []):
+                if item_id not in user_rated_items:
+                    candidate_score_map[item_id] = candidate_score_map.get(item_id, 0.0) + (feature_weight * 5)
 
-            # Check if Item category exists in the user preferences map
-            if item.category in user_preferences_map.keys():
-                candidate_score_map[candidate_item_id] = candidate_score_map[candidate_item_id] + (user_preferences_map[item.category] * 10)
+        # Extracting the top N candidates with a bounded heap instead of sorting every candidate
+        top_n_candidates = heapq.nlargest(n, candidate_score_map.items(), key=itemgetter(1))
 
-            # Check if Item tags exist in the user preferences map
-            if item.tags:
-                for tag in item.tags:
-                    # Adding the score in case tags were present in user preferences
-                    if tag in user_preferences_map.keys():
-                        candidate_score_map[candidate_item_id] = candidate_score_map[candidate_item_id] + (user_preferences_map[tag] * 5)
-        
-        # Sorting the candidate_score_map dictionary using bubble sort
-        candidate_score_map = bubble_sort_map_by_values(candidate_score_map)
-
-        # Initializing the final return map for the top n candidate items
-        first_n_candidates = []
-        count = 0
-        
-        # Iterating through the sorted candidate map
-        for item_id, score in candidate_score_map.items():
-            # Checking if the we still haven't found the first n items
-            if count < n:
-                first_n_candidates.append(item_id)
-                count = count + 1
-            
-            # Exiting the loop if we've found the top N candidates
-            else:
-                break
-        
         # Finally returning the top N recommended candidates
-        return first_n_candidates
+        return [item_id for item_id, _ in top_n_candidates]
@@ -1,10 +1,18 @@
-from typing import Dict, List
+import heapq
+from operator import itemgetter
+from typing import Dict, List, Set
 
 from algorithms.content_based import ContentBasedRecommender
-from utils.sorting import bubble_sort_list_with_tuples_second_element
 from algorithms.item_collaborative_filtering import ItemCollaborativeFilterer
 from algorithms.user_collaborative_filtering import UserCollaborativeFiltering
 
+# Default blend of the three recommenders, built once instead of on every call
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "content": 0.33,
+    "item_cf": 0.34,
+    "user_cf": 0.33
+}
+
 class HybridRecommender:
     """Class for implementing a hybrid recommendation algorithm"""
 
@@ -19,21 +27,12 @@ class HybridRecommender:
         self.item_based_collaborative_filterer = item_based_collaborative_filterer
         self.user_based_collaborative_filterer = user_based_collaborative_filterer
 
-    def get_hybrid_recommendations(
+    def get_candidate_lists(
         self,
         user_id: str,
-        n: int = 10,
-        weights: Dict[str, float] = None
-    ) -> List[str]:
-        """Method for retrieving hybrid recommendations based on weighted score from 3"""
-        # Checking if a weights map was passed
-        if not weights:
-            weights = {
-                "content": 0.33,
-                "item_cf": 0.34,
-                "user_cf": 0.33
-            }
-
+        n: int = 10
+    ) -> List[List[str]]:
+        """Method for retrieving the 2N-deep candidate lists of the content, item CF and user CF recommenders"""
         # Getting content based recommendations
         content_based_recommendations = self.content_based_filterer.recommend(
             user_id=user_id,
@@ -52,74 +51,104 @@ class HybridRecommender:
             n=2*n
         )
 
-        # Building a position hash map for each list of recommendations
-        content_based_map = {}
-        for index, item in enumerate(content_based_recommendations):
-            content_based_map[item] = index
+        # Returning the lists in the same order as the weight keys
+        return [
+            content_based_recommendations,
+            item_collaborative_filtering_recommendations,
+            user_collaborative_filtering_recommendations
+        ]
 
-        item_cf_based_map = {}
-        for index, item in enumerate(item_collaborative_filtering_recommendations):
-            item_cf_based_map[item] = index
-
-        user_cf_based_map = {}
-        for index, item in enumerate(user_collaborative_filtering_recommendations):
-            user_cf_based_map[item] = index
+    def combine_candidate_lists(
+        self,
+        candidate_lists: List[List[str]],
+        weights: Dict[str, float] = None
+    ) -> Dict[str, float]:
+        """Method for fusing the content, item CF and user CF candidate lists into one weighted score per item"""
+        # Falling back to the default weights if a weights map was not passed
+        if not weights:
+            weights = DEFAULT_WEIGHTS
 
-        # Get union of all items
-        union_set = (
-            set(content_based_recommendations) | 
-            set(item_collaborative_filtering_recommendations) | 
-            set(user_collaborative_filtering_recommendations)
+        # Pairing each list of recommendations with the weight of the recommender that produced it
+        weighted_recommendation_lists = zip(
+            candidate_lists,
+            [weights["content"], weights["item_cf"], weights["user_cf"]]
         )
 
-        # Converting back to list
-        union_list = list(union_set)
-
-        # Initializing list to store values
-        combined_score_list = []
-
-        # Iterating across all elements in all lists
-        for item in union_list:
-            # Initializing zero score
-            combined_score  = 0
-
-            # Checking in content based recommendations list
-            if item in content_based_map:
-                # Getting position score
-                position = content_based_map[item]
-                length_of_list = len(content_based_recommendations)
-                position_score = (length_of_list - position) / length_of_list
-                # Adding to the combined score multiplying by weight
-                combined_score = combined_score + (weights["content"] * position_score)
-
-            # Checking in the item based collaborative filtering list
-            if item in item_cf_based_map:
-                # Getting the position score
-                position = item_cf_based_map[item]
-                length_of_list = len(item_collaborative_filtering_recommendations)
-                position_score = (length_of_list - position) / length_of_list
-                # Adding to the combined score multiplying by weight
-                combined_score = combined_score + (weights["item_cf"] * position_score)
-
-            # Checking in the user based collaborative filtering list
-            if item in user_cf_based_map:
-                # Getting the position score
-                position = user_cf_based_map[item]
-                length_of_list = len(user_collaborative_filtering_recommendations)
-                position_score = (length_of_list - position) / length_of_list
-                # Adding to the combined score multiplying by weight
-                combined_score = combined_score + (weights["user_cf"] * position_score)
-
-            # Storing into the map
-            combined_score_list.append((item, combined_score))
-
-        # Sorting the list
-        combined_score_list = bubble_sort_list_with_tuples_second_element(combined_score_list)
-
-        # Extracted just the items
-        final_item_list = []
-        for item_score_tuple in combined_score_list:
-            final_item_list.append(item_score_tuple[0])
-
-        # Returning the top N elements
-        return final_item_list[:n]
\ No newline at end of file
+        # Initializing the map of combined scores for every item in the union of the lists
+        combined_score_map = {}
+
+        # Accumulating the weighted position score of each item straight from its position in each list
+        for recommendations, weight in weighted_recommendation_lists:
+            # Skipping recommenders that returned nothing
+            if not recommendations:
+                continue
+
+            # Folding the weight and the 1/length normalization into one factor per list
+            length_of_list = len(recommendations)
+            weight_per_rank = weight / length_of_list
+
+            for position, item in enumerate(recommendations):
+                # Adding the weighted position score (length - position) / length to the combined score
+                combined_score_map[item] = combined_score_map.get(item, 0) + ((length_of_list - position) * weight_per_rank)
+
+        # Returning the combined score of every candidate
+        return combined_score_map
+
+    def get_combined_scores(
+        self,
+        user_id: str,
+        n: int = 10,
+        weights: Dict[str, float] = None
+    ) -> Dict[str, float]:
+        """Method for fusing the 2N-deep lists of the 3 recommenders into one weighted score per item"""
+        # Scoring every candidate from the three recommenders
+        return self.combine_candidate_lists(self.get_candidate_lists(user_id, n), weights)
+
+    def get_hybrid_recommendations(
+        self,
+        user_id: str,
+        n: int = 10,
+        weights: Dict[str, float] = None
+    ) -> List[str]:
+        """Method for retrieving hybrid recommendations based on weighted score from 3"""
+        # Scoring every candidate from the three recommenders
+        combined_score_map = self.get_combined_scores(user_id, n, weights)
+
+        # Extracting the top N items with a bounded heap instead of sorting the whole list
+        top_n_items = heapq.nlargest(n, combined_score_map.items(), key=itemgetter(1))
+
+        # Returning just the item IDs
+        return [item for item, _ in top_n_items]
+
+    def get_filtered_hybrid_recommendations(
+        self,
+        user_id: str,
+        n: int = 10,
+        excluded_items: Set[str] = None,
+        allowed_items: Set[str] = None,
+        weights: Dict[str, float] = None
+    ) -> List[str]:
+        """Method for retrieving the top N hybrid recommendations that pass the filters, deepening the candidate pool until N pass"""
+        # Treating missing filters as excluding nothing and allowing everything
+        if excluded_items is None:
+            excluded_items = set()
+
+        # Starting from an N-deep pool and doubling it only while too few candidates pass
+        depth = n
+        while True:
+            candidate_lists = self.get_candidate_lists(user_id, depth)
+            combined_score_map = self.combine_candidate_lists(candidate_lists, weights)
+
+            # Keeping only the candidates that pass the filters, each check is a set lookup
+            passing_candidates = [
+                (item, score)
+                for item, score in combined_score_map.items()
+                if item not in excluded_items and (allowed_items is None or item in allowed_items)
+            ]
+            top_n_items = heapq.nlargest(n, passing_candidates, key=itemgetter(1))
+
+            # Stopping once N pass, or once every recommender ran out of candidates so a deeper pool adds nothing
+            if len(top_n_items) >= n or all(len(recommendations) < 2*depth for recommendations in candidate_lists):
+                return [item for item, _ in top_n_items]
+
+            depth = depth * 2
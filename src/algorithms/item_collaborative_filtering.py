@@ -1,54 +1,36 @@
+import heapq
+from collections import Counter
+from itertools import combinations
+from operator import itemgetter
 from typing import TYPE_CHECKING, Dict, Tuple, List
 
 if TYPE_CHECKING:
     from core.recommender import RecommendationEngine
 
-from utils.sorting import bubble_sort_list_with_tuples, bubble_sort_map_by_values
-
 class ItemCollaborativeFilterer:
     """Class that implements collaborative filtering strategy for recommendation"""
 
-    def __init__(self, engine: RecommendationEngine) -> None:
+    def __init__(self, engine: "RecommendationEngine") -> None:
         """Initializing the collaborative filtering object"""
         self.engine = engine
         self.cooccurence_matrix: Dict[Tuple[str,str], int] = {}
 
     def build_cooccurence_matrix(self) -> Dict[Tuple[str,str], int]:
         """Method to build the co-occurence matrix based off existing user ratings"""
-        # Re-initializing the coocurrence matrix
-        self.cooccurence_matrix = {}
+        # Re-initializing the coocurrence matrix as a counter of item pairs
+        self.cooccurence_matrix = Counter()
 
         # Iterating through the existing user ratings
-        for user_id, _ in self.engine.user_rating_store.items():
-            # Extracting the keys of the user rating store into a list
-            list_of_items = list(self.engine.user_rating_store.get(user_id).keys())
+        for user_ratings in self.engine.user_rating_store.values():
+            # Sorting the rated items into alphabetic order so every pair is emitted as (smaller, larger)
+            list_of_items = sorted(user_ratings)
 
-            if not list_of_items:
+            # A single rated item cannot form a pair
+            if len(list_of_items) < 2:
                 continue
 
-            # Looping through individual items
-            for i in range(0, len(list_of_items)):
-                for j in range(i+1, len(list_of_items)):
-                    # Storing the two items
-                    item1 = list_of_items[i]
-                    item2 = list_of_items[j]
-
-                    # Initializiing an empty tuple
-                    item_tuple = ()
-
-                    # Sorting the items into alphabetic order to prevent duplicates
-                    if item1 < item2:
-                        item_tuple = (item1, item2)
-                    else:
-                        item_tuple = (item2, item1)
-
-                    # If item tuple does not exist we initialize it with count of 1
-                    if item_tuple not in self.cooccurence_matrix.keys():
-                        self.cooccurence_matrix[item_tuple] = 1
-                    
-                    # If item tuple exists we increment its count by 1
-                    else:
-                        self.cooccurence_matrix[item_tuple] = self.cooccurence_matrix[item_tuple] + 1
+            # Counting every unique pair of items rated by this user in one update
+            self.cooccurence_matrix.update(combinations(list_of_items, 2))
 
         return self.cooccurence_matrix
     
@@ -58,23 +40,11 @@ class ItemCollaborativeFilterer:
         item2_id: str
     ) -> int:
         """Method to retrieve the coocurrence between two items"""
-        # Initializing an empty tuple
-        item_tuple = ()
-        
-        # Sorting the items into alphabetic order to find the right key
-        if item1_id < item2_id:
-            item_tuple = (item1_id, item2_id)
-        else:
-            item_tuple = (item2_id, item1_id)
-
-        # Retrieving the coocurrence values
-        coocurrence = self.cooccurence_matrix.get(item_tuple)
-
-        # Retrieving the value of coocurrence if it exists
-        if coocurrence:
-            return coocurrence
-        else:
-            return 0
+        # Sorting the items into alphabetic order to find the right key with a single tuple allocation
+        item_tuple = (item1_id, item2_id) if item1_id < item2_id else (item2_id, item1_id)
+
+        # Retrieving the coocurrence value, defaulting to 0 for pairs that were never rated together
+        return self.cooccurence_matrix.get(item_tuple, 0)
         
     def find_frequent_pairs(self, min_count: int = 10) -> List[Tuple]:
         """Method to retrieve pairs with atleast min_count number of coocurrences"""
@@ -88,8 +58,8 @@ class ItemCollaborativeFilterer:
                 # Adding the individual items and the coocurrence for subsequent sorting steps
                 frequent_pair_list.append((item_tuple[0], item_tuple[1], coocurrence))
 
-        # Sorting the list with frequent pairs
-        frequent_pair_list = bubble_sort_list_with_tuples(frequent_pair_list)
+        # Sorting the list with frequent pairs by coocurrence in descending order
+        frequent_pair_list.sort(key=itemgetter(2), reverse=True)
         return frequent_pair_list
     
     def recommend(
@@ -110,34 +80,27 @@ class ItemCollaborativeFilterer:
 
         # Iterating through the items that the user has rated
         for item_id, rating in user_rating_map.items():
-            # Retrieve the most similar items to that item
-            similar_items = self.engine.get_top_k_similar_items(item_id, k=10)
+            # Retrieve the most similar items to that item together with their similarity scores
+            similar_items = self.engine.get_top_k_similar_items_with_scores(item_id, k=10)
 
             # Looping throught the list of similar items
-            for similar_item_id in similar_items:
-                # Retrieving the similarity score
-                similarity = self.engine.get_item_similarity(item_id, similar_item_id)
-
+            for similar_item_id, similarity in similar_items:
                 # Calculating the score based on simlarity and rating from the user
                 score = similarity * rating
 
-                # Checking to see if the similar item exists or not
-                if similar_item_id not in candidate_scores:
-                    candidate_scores[similar_item_id] = 0
-                
                 # Adding the score to the map since more occurences = better
-                candidate_scores[similar_item_id] = candidate_scores[similar_item_id] + score
+                candidate_scores[similar_item_id] = candidate_scores.get(similar_item_id, 0) + score
 
         # Initializing final map for storing candidates not rated by the user
         final_candidate_scores = {}
 
         # Filtering out items that are already rated
         for item_id, score in candidate_scores.items():
-            if item_id not in user_rating_map.keys():
+            if item_id not in user_rating_map:
                 final_candidate_scores[item_id] = score
 
-        # Sorting the final candidate score map
-        final_candidate_scores = bubble_sort_map_by_values(final_candidate_scores)
+        # Extracting the top N candidates with a bounded heap instead of sorting every candidate
+        top_n_candidates = heapq.nlargest(n, final_candidate_scores.items(), key=itemgetter(1))
 
-        # Returning only the first n elements of this score map
-        return list(final_candidate_scores.keys())[:n]
+        # Returning only the item IDs of the top N candidates
+        return [item_id for item_id, _ in top_n_candidates]
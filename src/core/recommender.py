@@ -1,12 +1,22 @@
+import heapq
 import math
-from typing import List, Dict
+from collections import defaultdict
+from operator import itemgetter
+from typing import List, Dict, Tuple
 
 from core.user import User
 from core.item import Item
-from data_structures.heap import MinHeap
+from utils.matrix_ops import sparse_cosine_similarity
 from algorithms.content_based import ContentBasedRecommender
 from algorithms.item_collaborative_filtering import ItemCollaborativeFilterer
 from algorithms.user_collaborative_filtering import UserCollaborativeFiltering
+from algorithms.hybrid import HybridRecommender
+
+# Shared read-only fallback for users without ratings so lookups don't allocate a dict per call
+_EMPTY_RATINGS: Dict[str, float] = {}
+
+# Ratings at or above this value count as the user liking the item in the explanations
+HIGH_RATING_THRESHOLD = 4.0
 
 class RecommendationEngine:
     """Class that orchestrates all users and item management"""
@@ -19,8 +29,25 @@ class RecommendationEngine:
         self.user_rating_store: Dict[str, Dict[str,float]] = {}
         self.item_rating_store: Dict[str, Dict[str,float]] = {}
 
-        # Matrix that maps users to their ratings
-        self.user_item_matrix: List[List[float]] = []
+        # Running sums of squared ratings per user/item so vector magnitudes never need a full rescan
+        self.user_sq_norm: Dict[str, float] = {}
+        self.item_sq_norm: Dict[str, float] = {}
+
+        # Running sum of ratings per item so averages are a single division
+        self.item_rating_sum: Dict[str, float] = {}
+
+        # Counter bumped on every rating change of a user so derived per-user data can be cached
+        self.user_rating_version: Dict[str, int] = {}
+
+        # Precomputed top similar items per item and how many were kept for each, cleared on every rating write
+        self.item_similarity_cache: Dict[str, List[Tuple[str, float]]] = {}
+        self.item_similarity_cache_depth: int = 0
+
+        # Each user's highly rated items with their ratings, kept in sync on every rating write
+        self.user_high_rated_items: Dict[str, Dict[str, float]] = {}
+
+        # Dense user-item matrix, only materialized from the rating stores on demand and dropped on every write
+        self._user_item_matrix_cache: List[List[float]] | None = None
         
         # Bidirectional mapping of users/items to index in the matrix and vice versa
         self.user_to_index: Dict[str,int] = {}
@@ -33,6 +60,24 @@ class RecommendationEngine:
         self.item_based_collaborative_filtering = ItemCollaborativeFilterer(self)
         self.user_based_collaborative_filtering = UserCollaborativeFiltering(self)
 
+        # Single hybrid recommender over the three algorithms, shared by every batch and filtered request
+        self.hybrid_recommender = HybridRecommender(
+            content_based_filterer=self.content_based_filtering,
+            item_based_collaborative_filterer=self.item_based_collaborative_filtering,
+            user_based_collaborative_filterer=self.user_based_collaborative_filtering
+        )
+
+    @property
+    def user_item_matrix(self) -> List[List[float]]:
+        """Method that materializes the dense user-item matrix from the sparse rating stores when read after a change"""
+        # Reusing the last materialized matrix while nothing has changed
+        if self._user_item_matrix_cache is None:
+            # Scattering every user's ratings into a zeroed row, only O(nnz) writes on top of the allocation
+            self._user_item_matrix_cache = [self.get_user_vector(user_id) for user_id in self.index_to_user]
+
+        # Returning the dense matrix
+        return self._user_item_matrix_cache
+
     def add_user(self, user_object: User) -> None:
         """Adding the user object to the appropriate stores"""
         # Adding the user to the user storage map
@@ -43,27 +88,13 @@ class RecommendationEngine:
         self.user_to_index[user_object.user_id] = length_of_index
         self.index_to_user.append(user_object.user_id)
 
-        # Getting the length of the existing list of items
-        number_of_items = len(self.index_to_item)
-
-        # Adding a new subarray into the list with the same number of 0s as there are number of items
-        new_subarray = []
-        for i in range(0,number_of_items):
-            new_subarray.append(0)
-
-        # Adding to the matrix
-        self.user_item_matrix.append(new_subarray)
+        # The dense matrix gained a row
+        self._user_item_matrix_cache = None
 
     def get_user(self, user_id: str) -> User | None:
         """Retrieving the user object from the User store"""
-        # O(1) lookup from the Hash Map
-        user_object = self.user_store.get(user_id)
-        
-        # Returning only if the user object exists in the map
-        if user_object:
-            return user_object
-        else:
-            return None
+        # O(1) lookup from the Hash Map, None when the user does not exist
+        return self.user_store.get(user_id)
         
     def add_item(self, item_object: Item) -> None:
         """Adding the item object to the appropriate stores"""
@@ -75,21 +106,58 @@ class RecommendationEngine:
         self.item_to_index[item_object.item_id] = length_of_index
         self.index_to_item.append(item_object.item_id)
 
-        # Adding 0 to each user's ratings to indicate a new item has been added
-        for subarray  in self.user_item_matrix:
-            subarray.append(0)
+        # The dense matrix gained a column
+        self._user_item_matrix_cache = None
+
+        # Keeping the content-based category and tag indices in sync with the item store
+        # Cached preferences are built from item categories and tags, so they are dropped when an item's features change
+        if self.content_based_filtering.index_item(item_object):
+            self.content_based_filtering.preference_cache = {}
 
     def get_item(self, item_id: str) -> Item | None:
         """Retrieving the item object from the Item store"""
-        # O(1) lookup from the Hash Map
-        item_object = self.item_store.get(item_id)
-
-        # Returning it when the item object exists
-        if item_object:
-            return item_object
-        else:
-            return None
+        # O(1) lookup from the Hash Map, None when the item does not exist
+        return self.item_store.get(item_id)
         
+    def _check_registered(self, user_id: str, item_id: str) -> None:
+        """Method to fail fast with a KeyError when the user or the item was never added"""
+        # Checking both index maps, just like the old dense matrix write did before any store is touched
+        if user_id not in self.user_to_index:
+            raise KeyError(user_id)
+        if item_id not in self.item_to_index:
+            raise KeyError(item_id)
+
+    def _apply_rating(
+        self,
+        user_id: str,
+        item_id: str,
+        rating: float
+    ) -> None:
+        """Method to write one rating to the stores and every running total derived from them"""
+        # Retrieving the user rating map from the store, creating it on the user's first rating
+        user_map = self.user_rating_store.setdefault(user_id, {})
+
+        # Remembering the rating being overwritten (0 if none) before the stores are updated
+        previous_rating = user_map.get(item_id, 0.0)
+
+        # Adding the item rating to the user's map and the user rating to the item's map
+        user_map[item_id] = rating
+        self.item_rating_store.setdefault(item_id, {})[user_id] = rating
+
+        # Swapping the previous rating's contribution for the new one in both squared norms
+        rating_delta = (rating * rating) - (previous_rating * previous_rating)
+        self.user_sq_norm[user_id] = self.user_sq_norm.get(user_id, 0.0) + rating_delta
+        self.item_sq_norm[item_id] = self.item_sq_norm.get(item_id, 0.0) + rating_delta
+
+        # Swapping the previous rating for the new one in the item's rating sum
+        self.item_rating_sum[item_id] = self.item_rating_sum.get(item_id, 0.0) + (rating - previous_rating)
+
+        # Adding or removing the item from the user's highly rated items
+        if rating >= HIGH_RATING_THRESHOLD:
+            self.user_high_rated_items.setdefault(user_id, {})[item_id] = rating
+        elif item_id in self.user_high_rated_items.get(user_id, _EMPTY_RATINGS):
+            del self.user_high_rated_items[user_id][item_id]
+
     def add_rating(
         self,
         user_id: str,
@@ -97,41 +165,46 @@ class RecommendationEngine:
         rating: float
     ) -> None:
         """Initializing a user-item rating to the Ratings store"""
-        # Retrieving the existing user rating map from the store
-        user_map = self.user_rating_store.get(user_id)
-        
-        # If user map exists we simply update it to add the new item rating
-        if user_map:
-            user_map[item_id] = rating
-            self.user_rating_store[user_id] = user_map
-
-        # If the user map does not exist we create a new map and add the item rating
-        else:
-            user_map = {}
-            user_map[item_id] = rating
-            self.user_rating_store[user_id] = user_map
-
-        # Retrieving the existing item rating map from the store
-        item_map = self.item_rating_store.get(item_id)
-
-        # If the item map exists we simply update it to add the new user rating
-        if item_map:
-            item_map[user_id] = rating
-            self.item_rating_store[item_id] = item_map
-
-        # If the item map does not exist we create a new map and add the user rating to that
-        else:
-            item_map = {}
-            item_map[user_id] = rating
-            self.item_rating_store[item_id] = item_map
-
-        # Working off the assumption that user-item indices exist in the matrix
-        # Finding the indices of users and items from the index lookups: O(1) again!
-        user_index = self.user_to_index[user_id]
-        item_index = self.item_to_index[item_id]
-
-        # Adding the rating to the user-item ratings matrix
-        self.user_item_matrix[user_index][item_index] = rating
+        # Rejecting unknown users and items before any store is mutated
+        self._check_registered(user_id, item_id)
+
+        # Writing the rating and its running totals
+        self._apply_rating(user_id, item_id, rating)
+
+        # Marking the user's derived data, the item similarity cache and the dense matrix as stale
+        self.user_rating_version[user_id] = self.user_rating_version.get(user_id, 0) + 1
+        self.item_similarity_cache = {}
+        self.item_similarity_cache_depth = 0
+        self._user_item_matrix_cache = None
+
+    def add_ratings_batch(
+        self,
+        user_ids: List[str],
+        item_ids: List[str],
+        ratings: List[float]
+    ) -> None:
+        """Method to add many user-item ratings in a single pass"""
+        # Pairing up the inputs, zip(strict=True) rejects mismatched inputs
+        rating_entries = list(zip(user_ids, item_ids, ratings, strict=True))
+
+        # Rejecting unknown users and items before any store is mutated, so a bad batch leaves nothing half applied
+        for user_id, item_id, _ in rating_entries:
+            self._check_registered(user_id, item_id)
+
+        # Users whose ratings changed, so their derived data is invalidated once per batch
+        touched_users = set()
+
+        # Applying every rating exactly as add_rating would
+        for user_id, item_id, rating in rating_entries:
+            self._apply_rating(user_id, item_id, rating)
+            touched_users.add(user_id)
+
+        # Marking the derived data of every touched user, the item similarity cache and the dense matrix as stale
+        for user_id in touched_users:
+            self.user_rating_version[user_id] = self.user_rating_version.get(user_id, 0) + 1
+        self.item_similarity_cache = {}
+        self.item_similarity_cache_depth = 0
+        self._user_item_matrix_cache = None
 
     def get_rating(
         self,
@@ -139,23 +212,25 @@ class RecommendationEngine:
         item_id: str
     ) -> float | None:
         """Method that retrieves the rating for the particular item by a user"""
-        # Retrieving the rating from the hashmap for faster lookup
-        user_ratings = self.user_rating_store.get(user_id, {})
-        rating = user_ratings.get(item_id)
-
-        # Returning the rating if it exists
-        if rating:
-            return rating
-        else:
-            return None
+        # Retrieving the rating from the hashmap for faster lookup, None when the user never rated the item
+        # A rating of 0.0 is a legitimate value and is returned as is
+        return self.user_rating_store.get(user_id, _EMPTY_RATINGS).get(item_id)
         
     def get_user_vector(self, user_id: str) -> List:
         """Method that retrieves the entire subarray for a particular user"""
         # Retrieving the index from the user index map
         user_index = self.user_to_index.get(user_id)
 
-        # Retrieving that specific subarray from the 2D matrix
-        user_row = self.user_item_matrix[user_index]
+        # Guarding against users that were never added
+        if user_index is None:
+            return []
+
+        # Scattering the user's sparse ratings into a zeroed row
+        user_row = [0] * len(self.index_to_item)
+        for item_id, rating in self.user_rating_store.get(user_id, {}).items():
+            user_row[self.item_to_index[item_id]] = rating
+
+        # Returning the array with the user ratings
         return user_row
     
     def get_item_vector(self, item_id: str) -> List:
@@ -163,10 +238,14 @@ class RecommendationEngine:
         # Retrieving the index from the item index map
         item_index = self.item_to_index.get(item_id)
 
-        # Retrieving that specific column from the 2D matrix
-        item_column = []
-        for subarray in self.user_item_matrix:
-            item_column.append(subarray[item_index])
+        # Guarding against items that were never added
+        if item_index is None:
+            return []
+
+        # Scattering the item's sparse ratings into a zeroed column instead of walking every matrix row
+        item_column = [0] * len(self.index_to_user)
+        for user_id, rating in self.item_rating_store.get(item_id, {}).items():
+            item_column[self.user_to_index[user_id]] = rating
         
         # Returning the array with the item ratings
         return item_column
@@ -184,37 +263,13 @@ class RecommendationEngine:
         if not item1_ratings_map or not item2_ratings_map:
             return 0.0
 
-        # Finding the common keys between the two hash maps
-        common_keys = item1_ratings_map.keys() & item2_ratings_map.keys()
-        
-        # Initializing sum variable for sum = (a1*b1) + (a2*b2) + (a3*b3) + ....
-        sum = 0.0
-
-        # Looping through the common keys and finding the dot product for the two vectors
-        if common_keys:
-            for key in common_keys:
-                sum = sum + (item1_ratings_map[key] * item2_ratings_map[key])
-
-        # Finding the magnitude of the first item (sqrt(a1^2 + a2^2 + a3^2 + ....))
-        item1_sum = 0.0
-        for rating in item1_ratings_map.values():
-            item1_sum = item1_sum + (rating**2)
-        
-        # Finding the square root
-        item1_magnitude = math.sqrt(item1_sum)
-
-        # Finding the magnitude of the second item (sqrt(b1^2 + b2^2 + b3^2 + ....))
-        item2_sum = 0.0
-        for rating in item2_ratings_map.values():
-            item2_sum = item2_sum + (rating**2)
-
-        # Finding the square root
-        item2_magnitude = math.sqrt(item2_sum)
-
-        if item1_magnitude == 0 or item2_magnitude == 0:
-            return 0.0
-        
-        return sum / (item1_magnitude * item2_magnitude)
+        # Computing the cosine of the two sparse rating vectors with the cached squared magnitudes
+        return sparse_cosine_similarity(
+            item1_ratings_map,
+            item2_ratings_map,
+            self.item_sq_norm[item1_id],
+            self.item_sq_norm[item2_id]
+        )
     
     def get_user_similarity(
         self,
@@ -229,36 +284,13 @@ class RecommendationEngine:
         if not user1_ratings_map or not user2_ratings_map:
             return 0.0
 
-        # Finding the common keys (items both users rated)
-        common_keys = user1_ratings_map.keys() & user2_ratings_map.keys()
-        
-        # Initializing sum variable for dot product
-        sum = 0.0
-
-        # Looping through the common keys and finding the dot product
-        if common_keys:
-            for key in common_keys:
-                sum = sum + (user1_ratings_map[key] * user2_ratings_map[key])
-
-        # Finding the magnitude of the first user
-        user1_sum = 0.0
-        for rating in user1_ratings_map.values():
-            user1_sum = user1_sum + (rating**2)
-        
-        user1_magnitude = math.sqrt(user1_sum)
-
-        # Finding the magnitude of the second user
-        user2_sum = 0.0
-        for rating in user2_ratings_map.values():
-            user2_sum = user2_sum + (rating**2)
-
-        user2_magnitude = math.sqrt(user2_sum)
-
-        if user1_magnitude == 0 or user2_magnitude == 0:
-            return 0.0
-        
-        similarity_score = sum / (user1_magnitude * user2_magnitude)
-        return similarity_score
+        # Computing the cosine of the two sparse rating vectors with the cached squared magnitudes
+        return sparse_cosine_similarity(
+            user1_ratings_map,
+            user2_ratings_map,
+            self.user_sq_norm[user1_id],
+            self.user_sq_norm[user2_id]
+        )
     
     def get_average_rating_for_item(self, item_id: str) -> float:
         """Method to calculate and retrieve the average rating for a particular item"""
@@ -269,123 +301,146 @@ class RecommendationEngine:
         if not item_ratings_map:
             return 0.0
         
-        # Iterating through the dictionary values and calculating sum
-        sum = 0.0
-        for rating in item_ratings_map.values():
-            sum = sum + rating
-
-        # Calculating the average rating and returning it
-        average_rating = sum / (len(item_ratings_map))
+        # Calculating the average rating from the cached running sum and returning it
+        average_rating = self.item_rating_sum[item_id] / len(item_ratings_map)
         return average_rating
     
     def get_item_popularity(self, item_id: str) -> int:
         """Method to retrieve how many users rated this item?"""
-        # Simply finding the length of the item's rating subarray
-        return len(self.item_rating_store[item_id])
+        # Simply finding the length of the item's rating map, dict length is stored so this is O(1)
+        # Items nobody rated yet have a popularity of 0
+        return len(self.item_rating_store.get(item_id, _EMPTY_RATINGS))
     
     def get_top_k_popular_items(self, k: int = 10) -> List[str]:
-        """Method to retrieve the top k most popular items using a min heap"""
-        # Initializing the min heap object
-        min_heap = MinHeap()
-
-        # Iterating through the rating store
-        for item_id, _ in self.item_rating_store.items():
-            # Getting how many people rated the item
-            popularity = self.get_item_popularity(item_id)
-
-            # Since we want the top k elements the root node in the heap will contain the smallest of the current top k
-            # This root node element is what will get replaced anyways if the new node is supposed to be in the top k
-            if len(min_heap) < k:
-                # Simply pushing the element if the current heap is less than k elements
-                min_heap.push((popularity, item_id))
-            
-            # In case the heap is full
-            else:
-                # Checking if the current item is supposed to be in the top k items
-                if popularity > min_heap.peek()[0]:
-                    # Remove the smallest node
-                    min_heap.pop()
-                    # Add the new item
-                    min_heap.push((popularity, item_id))
-
-        # While extracting results from a min heap we get the elements in ascending order
-        result = []
-        while len(min_heap) > 0:
-            _, item_id = min_heap.pop()
-            result.append(item_id)
-
-        # Initializing the two pointers
-        left = 0
-        right = len(result) - 1
-
-        # Reversing the list that is in ascending order to descending
-        # To ensure the larger popularity elements appear first
-        while left < right:
-            # Simply need to swap since the list is already in ascending order
-            temp_var = result[left]
-            result[left] = result[right]
-            result[right] = temp_var
-
-            # Moving the pointers
-            left = left + 1
-            right = right - 1
-
-        # Finally returning the top k element list
-        return result
+        """Method to retrieve the top k most popular items using a bounded heap selection"""
+        # heapq keeps the k largest in a C-level min heap and hands them back already in descending order
+        # Popularity is read off the iterated rating map, avoiding a method call and a second store lookup per item
+        top_items = heapq.nlargest(
+            k,
+            self.item_rating_store.items(),
+            key=lambda item_entry: len(item_entry[1])
+        )
+
+        # Keeping only the item IDs
+        return [item_id for item_id, _ in top_items]
     
+    def get_item_similarity_row(self, item_id: str) -> Dict[str, float]:
+        """Method to calculate the similarity between one item and every item sharing a rater with it"""
+        # Extracting the ratings data for the target item
+        item_ratings_map = self.item_rating_store.get(item_id)
+        item_sq_norm = self.item_sq_norm.get(item_id, 0.0)
+
+        if not item_ratings_map or item_sq_norm <= 0:
+            return {}
+
+        # Accumulating all dot products in one sweep through the item's raters and their other ratings
+        dot_products = defaultdict(float)
+        for user_id, rating in item_ratings_map.items():
+            for other_item_id, other_rating in self.user_rating_store[user_id].items():
+                if other_item_id != item_id:
+                    dot_products[other_item_id] += rating * other_rating
+
+        # Dividing each dot product by the product of the cached magnitudes, one sqrt per pair
+        similarity_row = {}
+        for other_item_id, dot_product in dot_products.items():
+            other_sq_norm = self.item_sq_norm[other_item_id]
+            if other_sq_norm > 0:
+                similarity_row[other_item_id] = dot_product / math.sqrt(item_sq_norm * other_sq_norm)
+
+        # Returning the similarities of the co-rated items
+        return similarity_row
+
+    def get_top_k_similar_items_with_scores(
+        self,
+        item_id: str,
+        k: int = 5
+    ) -> List[Tuple[str, float]]:
+        """Method to retrieve the top k most similar items to a particular item along with their similarity"""
+        # Serving from the precomputed cache when it holds at least k neighbours per item
+        if k <= self.item_similarity_cache_depth:
+            return self.item_similarity_cache.get(item_id, [])[:k]
+
+        # Only items sharing at least one rater with the target can be similar to it, and the
+        # similarity row is built from exactly those co-rated items, so nothing else is scanned
+        similarity_row = self.get_item_similarity_row(item_id)
+
+        # Returning top k similar items with their similarity scores in descending order
+        return heapq.nlargest(k, similarity_row.items(), key=itemgetter(1))
+
+    def build_item_similarity_cache(self, top_k_per_item: int = 100) -> None:
+        """Method to pre-compute and cache the top similar items for every rated item"""
+        # Re-initializing the cache so items are ranked from scratch
+        self.item_similarity_cache = {}
+        self.item_similarity_cache_depth = 0
+
+        # Ranking the neighbours of each rated item with a single similarity row sweep
+        for item_id in self.item_rating_store:
+            self.item_similarity_cache[item_id] = self.get_top_k_similar_items_with_scores(item_id, top_k_per_item)
+
+        # Only marking the depth once every item is filled in so lookups above never see a partial cache
+        self.item_similarity_cache_depth = top_k_per_item
+
     def get_top_k_similar_items(
         self,
         item_id: str,
         k: int = 5
     ) -> List[str]:
         """Method to retrieve the top k most similar items to a particular item"""
-        # Initializing the heap object
-        min_heap = MinHeap()
-
-        # Iterating through the item rating map
-        for store_item_id, _ in self.item_rating_store.items():
-            # Calculating item similarity between the two items if they are not the same item
-            if item_id != store_item_id:
-                similarity_score = self.get_item_similarity(
-                    item1_id=item_id,
-                    item2_id=store_item_id
-                )
-
-                # Checking if the length of heap is less than k and simply pushing if True
-                if len(min_heap) < k:
-                    min_heap.push((similarity_score, store_item_id))
-
-                # In case the heap is already full
-                else:
-                    # Checking if similarity score is greater than the smallest similarity in the heap
-                    if similarity_score > min_heap.peek()[0]:
-                        # Removing the smallest node and adding the new item
-                        min_heap.pop()
-                        min_heap.push((similarity_score, store_item_id))
-
-        # Extracting results for top k similar items in ascending order
+        # Reusing the scored lookup and keeping just the item IDs
         result = []
-        while len(min_heap) > 0:
-            _, similar_item_id = min_heap.pop()
+        for similar_item_id, _ in self.get_top_k_similar_items_with_scores(item_id, k):
             result.append(similar_item_id)
 
-        # Initializing two pointers
-        left = 0
-        right = len(result) - 1
-
-        # Reversing the list to descending order
-        while left < right:
-            temp_var = result[left]
-            result[left] = result[right]
-            result[right] = temp_var
-
-            # Moving the pointers
-            left = left + 1
-            right = right - 1
-
         # Returning top k similar items
         return result
     
+    def get_user_similarity_row(self, user_id: str) -> Dict[str, float]:
+        """Method to calculate the similarity between one user and every user sharing a rated item with them"""
+        # Extracting the ratings data for the target user
+        user_ratings_map = self.user_rating_store.get(user_id)
+        user_sq_norm = self.user_sq_norm.get(user_id, 0.0)
+
+        if not user_ratings_map or user_sq_norm <= 0:
+            return {}
+
+        # Accumulating all dot products in one sweep through the user's items and their other raters
+        dot_products = defaultdict(float)
+        for item_id, rating in user_ratings_map.items():
+            for other_user_id, other_rating in self.item_rating_store[item_id].items():
+                if other_user_id != user_id:
+                    dot_products[other_user_id] += rating * other_rating
+
+        # Dividing each dot product by the product of the cached magnitudes, one sqrt per pair
+        similarity_row = {}
+        for other_user_id, dot_product in dot_products.items():
+            other_sq_norm = self.user_sq_norm[other_user_id]
+            if other_sq_norm > 0:
+                similarity_row[other_user_id] = dot_product / math.sqrt(user_sq_norm * other_sq_norm)
+
+        # Returning the similarities of the co-rating users
+        return similarity_row
+
+    def get_top_k_similar_users_with_scores(
+        self,
+        user_id: str,
+        k: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Method to retrieve the top k most similar users to a particular user along with their similarity"""
+        # Only users sharing at least one rated item can be similar, and the row holds exactly those users
+        similarity_row = self.get_user_similarity_row(user_id)
+
+        # Returning top k similar users with their similarity scores in descending order
+        return heapq.nlargest(k, similarity_row.items(), key=itemgetter(1))
+
+    def get_top_k_similar_users(
+        self,
+        user_id: str,
+        k: int = 10
+    ) -> List[str]:
+        """Method to retrieve the top k most similar users to a particular user"""
+        # Reusing the scored lookup and keeping just the user IDs
+        return [similar_user_id for similar_user_id, _ in self.get_top_k_similar_users_with_scores(user_id, k)]
+    
     def explain_recommendations(
         self,
         user_id: str,
@@ -423,14 +478,18 @@ class RecommendationEngine:
                         # Adding to the explanations list
                         explanations.append(explanation)
 
-        # Explanations from item-based collaborative filtering
-        user_ratings = self.user_rating_store.get(user_id, {})
+        # Explanations from item-based collaborative filtering, only the user's highly rated items can qualify
+        high_rated_items = self.user_high_rated_items.get(user_id)
 
-        # Iterating through the user's ratings
-        for rated_item, rating in user_ratings.items():
-            # Checking if the user rated it highly
-            if rating >= 4.0:
-                # Calculating similarity between the rated item and the recommended item
+        # Skipping the similarity checks entirely when the user rated nothing highly
+        if high_rated_items:
+            # Iterating through the user's highly rated items
+            for rated_item, rating in high_rated_items.items():
+                # Skipping the recommended item itself
+                if rated_item == item_id:
+                    continue
+
+                # Calculating similarity between the rated item and the recommended item, only these pairs are needed
                 similarity = self.get_item_similarity(rated_item, item_id)
 
                 # Checking if the similarity is high
@@ -452,7 +511,7 @@ class RecommendationEngine:
             rating = self.get_rating(similar_user_id, item_id)
 
             # Checking if the rating exists and is high
-            if rating and rating >= 4.0:
+            if rating is not None and rating >= HIGH_RATING_THRESHOLD:
                 # Incrementing the counter
                 high_rating_count = high_rating_count + 1
 
@@ -477,6 +536,11 @@ class RecommendationEngine:
             # Building the user neighborhoods for faster lookups
             self.user_based_collaborative_filtering.build_user_neighbourhoods(k=10)
 
+        # Checking if the item similarity cache is built
+        if not self.item_similarity_cache_depth:
+            # Building the item similarity cache for faster item-based lookups
+            self.build_item_similarity_cache()
+
         # Checking if cooccurrence matrix is built
         if not self.item_based_collaborative_filtering.cooccurence_matrix:
             # Building the cooccurrence matrix for faster lookups
@@ -498,17 +562,7 @@ class RecommendationEngine:
         # Iterating through all user IDs
         for user_id in user_ids:
             # Getting hybrid recommendations for that user
-            from algorithms.hybrid import HybridRecommender
-            
-            # Initializing the hybrid recommender
-            hybrid_recommender = HybridRecommender(
-                content_based_filterer=self.content_based_filtering,
-                item_based_collaborative_filterer=self.item_based_collaborative_filtering,
-                user_based_collaborative_filterer=self.user_based_collaborative_filtering
-            )
-            
-            # Getting the recommendations
-            recommendations = hybrid_recommender.get_hybrid_recommendations(user_id, n)
+            recommendations = self.hybrid_recommender.get_hybrid_recommendations(user_id, n)
             
             # Adding to the results dictionary
             results[user_id] = recommendations
@@ -524,61 +578,28 @@ class RecommendationEngine:
         min_rating: float = None
     ) -> List[str]:
         """Method to generate recommendations with user-specified filters"""
-        # Getting more candidates than needed since many will be filtered
-        from algorithms.hybrid import HybridRecommender
-        
-        # Initializing the hybrid recommender
-        hybrid_recommender = HybridRecommender(
-            content_based_filterer=self.content_based_filtering,
-            item_based_collaborative_filterer=self.item_based_collaborative_filtering,
-            user_based_collaborative_filterer=self.user_based_collaborative_filtering
+        # Filter 1: Excluding the items the user already rated, a set of the keys of their rating map
+        excluded_items = set(self.user_rating_store.get(user_id, _EMPTY_RATINGS))
+
+        # Filter 2: Excluding every item of the excluded categories straight from the category index
+        if exclude_categories:
+            category_index = self.content_based_filtering.category_index
+            for category in set(exclude_categories):
+                excluded_items.update(category_index.get(category, []))
+
+        # Filter 3: Allowing only items whose average rating meets the minimum, one pass over the cached rating sums
+        allowed_items = None
+        if min_rating:
+            allowed_items = {
+                item_id
+                for item_id, item_ratings_map in self.item_rating_store.items()
+                if item_ratings_map and self.item_rating_sum[item_id] / len(item_ratings_map) >= min_rating
+            }
+
+        # Generating candidates with the filters applied, deepening the pool until N items pass
+        return self.hybrid_recommender.get_filtered_hybrid_recommendations(
+            user_id,
+            n=n,
+            excluded_items=excluded_items,
+            allowed_items=allowed_items
         )
-        
-        # Getting three times as many candidates
-        candidates = hybrid_recommender.get_hybrid_recommendations(user_id, n=3*n)
-
-        # Initializing the filtered list
-        filtered = []
-
-        # Iterating through the candidates
-        for item_id in candidates:
-            # Getting the item object
-            item = self.get_item(item_id)
-
-            # Checking if item exists
-            if not item:
-                # Skip to next item
-                continue
-
-            # Filter 1: Checking exclude categories
-            if exclude_categories:
-                # Checking if item category is in the excluded list
-                if item.category in exclude_categories:
-                    # Skip this item
-                    continue
-
-            # Filter 2: Checking minimum rating
-            if min_rating:
-                # Getting the average rating for the item
-                avg_rating = self.get_average_rating_for_item(item_id)
-                # Checking if it meets the minimum
-                if avg_rating < min_rating:
-                    # Skip this item
-                    continue
-
-            # Filter 3: Checking if user already rated it
-            user_rating = self.get_rating(user_id, item_id)
-            if user_rating:
-                # Skip this item
-                continue
-
-            # Item passed all filters so add it to the list
-            filtered.append(item_id)
-
-            # Checking if we have enough items
-            if len(filtered) >= n:
-                # Stop searching
-                break
-
-        # Returning the filtered list with top N items
-        return filtered[:n]
\ No newline at end of file
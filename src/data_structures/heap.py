@@ -12,93 +12,61 @@ class MinHeap:
         # Using len function on the array
         return len(self.heap)
     
-    def _get_parent_index(self, i: int) -> int:
-        """In a Min Heap, the parent is at the beginning of the array"""
-        # Mathematically, the child node is 16 -> 8 -> 4 -> 2 and so on
-        return (i-1) // 2
-    
-    def _get_left_child_index(self, i: int) -> int:
-        """In a Min Heap, the child node is after that node but one index before the right child"""
-        # Mathematically, the left node is at 0 -> 1 -> 3 -> 7 and so on
-        return (2*i) + 1
-    
-    def _get_right_child_index(self, i: int) -> int:
-        """In a Min Heap, the child node is after that node but one index after the left child"""
-        # Mathematically, the left node is at 0 -> 2 -> 4 -> 8 and so on
-        return (2*i) + 2
-    
-    def _has_parent(self, i: int) -> bool:
-        """Helper function to check if a node has a parent node"""
-        # Checking if a node at index 'i' has a parent node with an index within the scope of the array
-        if self._get_parent_index(i) >= 0:
-            return True
-        else:
-            return False
-    
-    def _has_left_child(self, i: int) -> bool:
-        """Helper function to check if a node has a left child node"""
-        # Checking if the node at index 'i' has a left child node with an index within the scope of the array
-        if self._get_left_child_index(i) < len(self.heap):
-            return True
-        else:
-            return False
-    
-    def _has_right_child(self, i:int) -> bool:
-        """Helper function to check if a node has a right child node"""
-        # Checking if the node at index 'i' has a right child node with an index within the scope of the array
-        if self._get_right_child_index(i) < len(self.heap):
-            return True
-        else:
-            return False
-    
-    def _swap(self, i: int, j: int) -> None:
-        """Helper function to swap two nodes in a heap"""
-        # Swapping the elements using Tower of Hanoi strategy
-        temp_node = self.heap[i]
-        self.heap[j] = self.heap[i]
-        self.heap[i] = temp_node
-
     def _bubble_up(self, index: int) -> None:
         """A helper method that preserves heap structure during adding an element"""
-        # Continue performing the operation as long as current index has a parent node
-        while self._has_parent(index):
-            # Retrieving the parent index
-            parent_index = self._get_parent_index(index)
-
-            # Checking to see if the node at parent index is less than the node at current index
-            if self.heap[parent_index] > self.heap[index]:
-                # Swapping the nodes to maintain heap property
-                self._swap(index,parent_index)
+        # Binding the array locally and holding the new node aside while larger parents move down into its slot
+        heap = self.heap
+        node = heap[index]
+
+        # Continue performing the operation as long as current index has a parent node, found at (i-1) // 2
+        while index > 0:
+            parent_index = (index - 1) // 2
+            parent_node = heap[parent_index]
+
+            # Checking to see if the node at parent index is greater than the node being placed
+            if parent_node > node:
+                # Moving the parent down into the hole to maintain heap property
+                heap[index] = parent_node
                 index = parent_index # Move up
 
             # The heap property of parent < child is satisfied
             else:
                 break
 
+        # Dropping the node into its final slot with a single write
+        heap[index] = node
+
     def _bubble_down(self, index: int) -> None:
         """A helper method that moves the nodes down until the heap structure is preserved"""
+        # Binding the array locally and holding the node aside while smaller children move up into its slot
+        heap = self.heap
+        length_of_heap = len(heap)
+        node = heap[index]
+
+        # The left child is at 2i+1 and the right child right after it at 2i+2
+        smaller_child_index = (2*index) + 1
+
         # While the node has atleast one valid child node
-        while self._has_left_child(index):
-            # Find child node index
-            smaller_child_index = self._get_left_child_index(index)
-
-            # Checking to see if node also has a right child
-            if self._has_right_child(index):
-                right_child_index = self._get_right_child_index(index)
-                # Checking to see which is the smaller child - left or right child node
-                if self.heap[smaller_child_index] > self.heap[right_child_index]:
-                    smaller_child_index = right_child_index
-
-            # Comparing the index element with the smaller child index
-            if self.heap[index] > self.heap[smaller_child_index]:
-                # Swapping the element if the current index has a child smaller than it
-                self._swap(index, smaller_child_index)
+        while smaller_child_index < length_of_heap:
+            # Checking to see which is the smaller child - left or right child node
+            right_child_index = smaller_child_index + 1
+            if right_child_index < length_of_heap and heap[smaller_child_index] > heap[right_child_index]:
+                smaller_child_index = right_child_index
+
+            # Comparing the node being placed with the smaller child
+            if node > heap[smaller_child_index]:
+                # Moving the smaller child up into the hole
+                heap[index] = heap[smaller_child_index]
                 index = smaller_child_index # Move down
+                smaller_child_index = (2*index) + 1
 
             # The min-heap property of parent < child is satisfied
             else:
                 break
 
+        # Dropping the node into its final slot with a single write
+        heap[index] = node
+
     def peek(self) -> int:
         """View the minimum element (root) without removing it"""
         # Nothing to return if heap is empty
@@ -121,16 +89,14 @@ class MinHeap:
         # Storing the value of the smallest element at the root index
         minimum_value = self.heap[0]
 
-        # Moving the last element of the array to the root node (to in effect remove the root node)
-        self.heap[0] = self.heap[-1]
-
-        # Removing the duplicate last element of the array
-        self.heap.pop()
+        # Removing the last element of the array
+        last_value = self.heap.pop()
 
-        # Restructuring the heap to ensure that the order is correct
+        # Moving it to the root node (to in effect remove the root node) and restructuring the heap
         if len(self.heap) > 0:
-            # We start from the root node now and swap down
-            self._bubble_down(0) 
+            self.heap[0] = last_value
+            # We start from the root node now and move down
+            self._bubble_down(0)
 
         # Return the original root value
         return minimum_value
\ No newline at end of file
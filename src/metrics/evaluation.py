@@ -1,4 +1,6 @@
-from typing import List, TYPE_CHECKING
+import random
+from itertools import chain, combinations, islice
+from typing import Dict, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from core.recommender import RecommendationEngine
@@ -17,21 +19,29 @@ class RecommenderMetrics:
         if k <= 0:
             return 0
 
-        # Retrieve the top K recommendations
-        top_k_recommendations = recommendations[:k]
+        # Hashing the relevant items once so each membership check is O(1) instead of a list scan
+        relevant_item_set = set(relevant_items)
 
-        # Initalizing a counter to get the total number of elements that were relevant
-        relevant_item_count = 0
-
-        # Counting the number of recommendations in relevant items
-        for item in top_k_recommendations:
-            if item in relevant_items:
-                relevant_item_count = relevant_item_count + 1
+        # Counting the number of top K recommendations in relevant items by summing the membership booleans
+        relevant_item_count = sum(item in relevant_item_set for item in islice(recommendations, k))
 
         # Calculating precision
         precision = relevant_item_count / k
         return precision
     
+    @staticmethod
+    def calculate_precision_at_k_batch(
+        recommendations_per_user: List[List[str]],
+        relevant_items_per_user: List[List[str]],
+        k: int
+    ) -> List[float]:
+        """Method to calculate precision at K for each user with calculate_precision_at_k, one value per user"""
+        # Scoring each user with the single-user precision, zip(strict=True) rejects mismatched inputs
+        return [
+            RecommenderMetrics.calculate_precision_at_k(recommendations, relevant_items, k)
+            for recommendations, relevant_items in zip(recommendations_per_user, relevant_items_per_user, strict=True)
+        ]
+
     @staticmethod
     def calculate_recall_at_k(
         recommendations: List[str],
@@ -43,21 +53,61 @@ class RecommenderMetrics:
         if k <= 0:
             return 0
         
-        # Retrieve the top K recommendations
-        top_k_recommendations = recommendations[:k]
+        # Nothing can be recalled when there are no relevant items
+        if not relevant_items:
+            return 0.0
 
-        # Initializing a counter to get the total number of elements that were relevant
-        relevant_item_count = 0
+        # Hashing the relevant items once so each membership check is O(1) instead of a list scan
+        relevant_item_set = set(relevant_items)
+        number_of_relevant_items = len(relevant_item_set)
 
-        # Counting the number of recommendations in relevant items
-        for item in top_k_recommendations:
-            if item in relevant_items:
+        # Counting the number of top K recommendations in relevant items
+        relevant_item_count = 0
+        for item in islice(recommendations, k):
+            if item in relevant_item_set:
                 relevant_item_count = relevant_item_count + 1
 
+                # Stopping early once every relevant item has been found since no more hits are possible
+                if relevant_item_count == number_of_relevant_items:
+                    break
+
         # Calculating recall
         recall = relevant_item_count / len(relevant_items)
         return recall
     
+    @staticmethod
+    def evaluate_batch(
+        recommendations_per_user: List[List[str]],
+        relevant_items_per_user: List[List[str]],
+        k: int,
+        max_queries: int = 10000,
+        seed: int = 0
+    ) -> Dict[str, float]:
+        """Method to average precision and recall at K over many users, capped at max_queries users"""
+        # Pairing each user's recommendations with their relevant items, zip(strict=True) rejects mismatched inputs
+        queries = list(zip(recommendations_per_user, relevant_items_per_user, strict=True))
+
+        # Nothing to evaluate
+        if not queries:
+            return {"precision": 0.0, "recall": 0.0}
+
+        # Evaluating a fixed-seed random sample when there are too many users, assuming it is representative
+        if len(queries) > max_queries:
+            queries = random.Random(seed).sample(queries, max_queries)
+
+        # Accumulating both metrics over the evaluated users
+        total_precision = 0.0
+        total_recall = 0.0
+        for recommendations, relevant_items in queries:
+            total_precision = total_precision + RecommenderMetrics.calculate_precision_at_k(recommendations, relevant_items, k)
+            total_recall = total_recall + RecommenderMetrics.calculate_recall_at_k(recommendations, relevant_items, k)
+
+        # Averaging over the number of evaluated users
+        return {
+            "precision": total_precision / len(queries),
+            "recall": total_recall / len(queries)
+        }
+
     @staticmethod
     def calculate_coverage(
         all_recommendations: List[List[str]],
@@ -68,13 +118,9 @@ class RecommenderMetrics:
         if total_items <= 0:
             return 0
 
-        # Initializing a set to store all unique items
+        # Collecting all unique items recommended, chaining every user's list into one C-level set update
         unique_items_recommended = set()
-
-        # Iterating through all the items recommended
-        for user_recommendations in all_recommendations:
-            for item in user_recommendations:
-                unique_items_recommended.add(item)
+        unique_items_recommended.update(chain.from_iterable(all_recommendations))
 
         # Counting the unique items
         unique_item_count = len(unique_items_recommended)
@@ -86,7 +132,7 @@ class RecommenderMetrics:
     @staticmethod
     def calculate_diversity(
         recommendations: List[str],
-        engine: RecommendationEngine
+        engine: "RecommendationEngine"
     ) -> float:
         """Method to measure how different recommended items are too each other"""
         # Checking to see that there are any items
@@ -97,25 +143,15 @@ class RecommenderMetrics:
         if len(recommendations) == 1:
             return 1.0
         
-        # Initializing a list to store all the pair-wise similarities
-        similarity_list = []
-
-        # Iterating through the list of recommendations
-        for i in range(0, len(recommendations)):
-            for j in range(i+1, len(recommendations)):
-                item1 = recommendations[i]
-                item2 = recommendations[j]
-
-                # Estimating the item similarity between the two
-                similarity = engine.get_item_similarity(item1, item2)
-                similarity_list.append(similarity)
-
-        # Checking to see that similarities exist
-        if len(similarity) <= 0:
-            return 0.0
-        
-        # Calculating the average similarity
-        average_similarity = sum(similarity_list) / len(similarity_list)
+        # Summing the pair-wise similarities of every unordered pair of recommendations in one pass
+        total_similarity = sum(
+            engine.get_item_similarity(item1, item2)
+            for item1, item2 in combinations(recommendations, 2)
+        )
+
+        # Calculating the average similarity over the n(n-1)/2 pairs
+        number_of_pairs = len(recommendations) * (len(recommendations) - 1) // 2
+        average_similarity = total_similarity / number_of_pairs
 
         # Diversity is the complement of similarity
         diversity = 1 - average_similarity
@@ -1,3 +1,4 @@
+import math
 from typing import List, Dict, Tuple
 
 def transpose_matrix(matrix: List[List[int]]) -> List[List[int]] | None:
@@ -6,56 +7,25 @@ def transpose_matrix(matrix: List[List[int]]) -> List[List[int]] | None:
     if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
 
-    # Getting the height and length of the matrix
-    height_of_matrix = len(matrix)
-    length_of_matrix = len(matrix[0])
-
-    # Initializing an empty matrix
-    new_matrix = []
-    for i in range(length_of_matrix):
-        row = []
-        for j in range(height_of_matrix):
-            row.append(0)
-        new_matrix.append(row)
-
-    # Iterating through the old matrix
-    for i in range(0, len(matrix)):
-        # Iterating through length
-        for j in range(0, len(matrix[0])):
-            # Swapping the position of the matrix
-            new_matrix[j][i] = matrix[i][j]
+    # zip(*matrix) yields the columns of the matrix, which are exactly the rows of the transpose
+    # The whole traversal runs in C, so there is no pre-filled zero matrix and no per-element index writes
+    new_matrix = [list(column) for column in zip(*matrix)]
 
     # Returning the transposed matrix
     return new_matrix
 
 def rotate_matrix_clockwise(matrix: List[List[int]]) -> List[List[int]] | None:
     """Method to rotate a matrix clockwise by 90 degrees"""
-    # First step is to transpose the matrix
-    transposed_matrix = transpose_matrix(matrix)
-
-    # Checking that the transposed matrix exists
-    if not transposed_matrix:
+    # Ensuring the length and height of the matrix are greater than 0
+    if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
-    
-    # Reversing each individual list
-    for i in range(0, len(transposed_matrix)):
-        # Initializing the two pointers
-        left = 0
-        right = len(transposed_matrix[0]) - 1
-
-        # Two pointer approach for reversing a list
-        while left <= right:
-            # Swapping the elements
-            temporary_variable = transposed_matrix[i][left]
-            transposed_matrix[i][left] = transposed_matrix[i][right]
-            transposed_matrix[i][right] = temporary_variable
-
-            # Incrementing and decrementing the pointers
-            left = left + 1
-            right = right - 1
+
+    # Transposing the rows in bottom-to-top order gives the clockwise rotation in a single pass
+    # Each output row is column j read from the last row up, so no separate reverse pass is needed
+    rotated_matrix = [list(column) for column in zip(*reversed(matrix))]
 
     # Finally returning the matrix that is now rotated by 90
-    return transposed_matrix
+    return rotated_matrix
 
 def spiral_matrix(matrix: List[List[int]]) -> List[int] | None:
     """Method to extract the elements of a list in spiral order"""
@@ -63,42 +33,42 @@ def spiral_matrix(matrix: List[List[int]]) -> List[int] | None:
     if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
 
+    # Getting the length and height of the matrix
+    rows = len(matrix)
+    columns = len(matrix[0])
+
     # Initializing variables for the boundaries of the matrix
     top = 0
-    bottom = len(matrix) - 1
+    bottom = rows - 1
     left = 0
-    right = len(matrix[0]) - 1
+    right = columns - 1
 
     # Initializing the result list
     result_list = []
     
     # Creating a loop until the base condition is satisfied
     while top <= bottom and left <= right:
-        # Traversing right
-        for column_variable in range(left, right+1):
-            result_list.append(matrix[top][column_variable])
+        # Traversing right, the top row segment is contiguous so a slice is copied in one go
+        result_list.extend(matrix[top][left:right+1])
         # Now we reduce the boundary to remove the top row
         top = top + 1
 
-        # Traversing down
-        for row_variable in range(top, bottom+1):
-            result_list.append(matrix[row_variable][right])
+        # Traversing down, gathering the strided column segment in one comprehension
+        result_list.extend([matrix[row_variable][right] for row_variable in range(top, bottom+1)])
         # Now we reduce the boundary to remove the rightmost column
         right = right - 1
 
         # Checking that there is a row to traverse
         if top <= bottom:
-            # Traversing left
-            for column_variable in range(right, left-1, -1):
-                result_list.append(matrix[bottom][column_variable])
+            # Traversing left, the bottom row segment read back to front
+            result_list.extend(reversed(matrix[bottom][left:right+1]))
             # Now we reduce the boundary to remove the bottom row
             bottom = bottom - 1
 
         # Checking that there is a column to traverse
         if left <= right:
-            # Traversing up
-            for row_variable in range(bottom, top-1, -1):
-                result_list.append(matrix[row_variable][left])
+            # Traversing up, gathering the strided column segment in one comprehension
+            result_list.extend([matrix[row_variable][left] for row_variable in range(bottom, top-1, -1)])
             # Now we reduce the boundary to remove the leftmost column
             left = left + 1
 
@@ -111,52 +81,22 @@ def diagonal_traverse(matrix: List[List[int]]) -> List[int] | None:
     if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
     
+    # Getting the length and height of the matrix
+    rows = len(matrix)
+    columns = len(matrix[0])
+    
     # Initializing the result list
     result_list = []
     
-    # Initializing starting position
-    row_index = 0
-    column_index = 0
-    
-    # First Pass - Diagonals starting from top row
-    while column_index < len(matrix[0]):
-        # Initializing pointer variables
-        i = row_index
-        j = column_index
+    # Walking every anti-diagonal in order, the first columns ones start on the top row and the rest on the right column
+    for diagonal_index in range(rows + columns - 1):
+        # Finding where this diagonal starts
+        row_index = max(0, diagonal_index - columns + 1)
+        column_index = diagonal_index - row_index
         
-        # Checking to see if pointers are within bounds
-        while i < len(matrix) and j >= 0:
-            # Appending element to traversal
-            result_list.append(matrix[i][j])
-
-            # Incrementing and decrementing pointers
-            i = i + 1
-            j = j - 1
-        
-        # Incrementing column pointer
-        column_index = column_index + 1
-    
-    # Initializing starting positions (skip top-left corner)
-    row_index = 1
-    column_index = len(matrix[0]) - 1
-    
-    # Second Pass - Diagonals starting from left column
-    while row_index < len(matrix):
-        # Initializing pointer variables
-        i = row_index
-        j = column_index
-        
-        # Checking to see if pointers are within bounds
-        while i < len(matrix) and j >= 0:
-            # Appending element to traversal
-            result_list.append(matrix[i][j])
-            
-            # Incrementing and decrementing pointers
-            i = i + 1
-            j = j - 1
-        
-        # Incrementing row pointer
-        row_index = row_index + 1
+        # Gathering the diagonal down-left until it leaves the bottom or the left edge
+        diagonal_length = min(rows - row_index, column_index + 1)
+        result_list.extend([matrix[row_index + step][column_index - step] for step in range(diagonal_length)])
     
     # Returning the final result
     return result_list
@@ -167,35 +107,34 @@ def set_missing_to_zero(matrix: List[List[int]], flag_value: int = -1) -> List[L
     if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
     
-    # Getting the length and height of the matrix
-    rows = len(matrix)
+    # Getting the width of the matrix for the zero row, the rows themselves are walked with enumerate
     columns = len(matrix[0])
 
-    # Initializing empty lists to mark both rows and columns
-    marked_rows = []
-    marked_columns = []
-
-    # Iteratign through the rows and the columns of the 2D matrix
-    for i in range(0, rows):
-        for j in range(0, columns):
-            # Checking if the value of the matrix matches the flag value
-            if matrix[i][j] == flag_value:
-                # Adding the values to the marked rows
-                if i not in marked_rows:
-                    marked_rows.append(i)
-                # Adding the values to the marked columns
-                if j not in marked_columns:
-                    marked_columns.append(j)
+    # Initializing sets to mark both rows and columns, O(1) inserts with no duplicate checks
+    marked_rows = set()
+    marked_columns = set()
+
+    # Iterating through the rows of the 2D matrix
+    for i, row_values in enumerate(matrix):
+        # Scanning the row for the flag value in C first and only walking the rows that contain it
+        if flag_value in row_values:
+            marked_rows.add(i)
+            # Adding the columns where the value of the matrix matches the flag value
+            for j, value in enumerate(row_values):
+                if value == flag_value:
+                    marked_columns.add(j)
     
-    # Turn the marked rows to zero
+    # Turn the marked rows to zero with a single slice assignment per row
+    zero_row = [0] * columns
     for row in marked_rows:
-        for j in range(0, columns):
-            matrix[row][j] = 0
+        matrix[row][:] = zero_row
     
-    # Turn the marked columns to zero
-    for column in marked_columns:
-        for i in range(0, rows):
-            matrix[i][column] = 0
+    # Turn the marked columns to zero, skipping the rows that are already all zeros
+    if marked_columns:
+        for i, row_values in enumerate(matrix):
+            if i not in marked_rows:
+                for column in marked_columns:
+                    row_values[column] = 0
 
     # Returning the corrected matrix
     return matrix
@@ -206,14 +145,41 @@ def get_sparse_representation(matrix: List[List[int]]) -> Dict[Tuple[int, int],
     if len(matrix) <= 0 or len(matrix[0]) <= 0:
         return None
 
-    # Creating a hash map for sparse representation of the matrix
-    sparse_map = {}
-
-    # Iterating through the rows and columns of the 2D matrix
-    for i in range(0, len(matrix)):
-        for j in range(0, len(matrix[0])):
-            if matrix[i][j] != 0:
-                sparse_map[(i,j)] = matrix[i][j]
+    # Creating a hash map for sparse representation of the matrix in a single comprehension
+    # enumerate hands over each row and value directly instead of indexing matrix[i][j] twice per cell
+    sparse_map = {
+        (i, j): value
+        for i, row in enumerate(matrix)
+        for j, value in enumerate(row)
+        if value != 0
+    }
 
     # Return the sparse representation of the matrix
-    return sparse_map
\ No newline at end of file
+    return sparse_map
+
+def sparse_cosine_similarity(
+    vector1: Dict[str, float],
+    vector2: Dict[str, float],
+    vector1_sq_norm: float,
+    vector2_sq_norm: float
+) -> float:
+    """Method to find the cosine similarity of two sparse vectors given their squared magnitudes"""
+    # Ensuring that both vectors have a magnitude before doing any work
+    if vector1_sq_norm <= 0 or vector2_sq_norm <= 0:
+        return 0.0
+
+    # Probing the smaller hash map against the larger one so no intersection set is ever built
+    if len(vector1) > len(vector2):
+        smaller_vector, larger_vector = vector2, vector1
+    else:
+        smaller_vector, larger_vector = vector1, vector2
+
+    # Finding sum = (a1*b1) + (a2*b2) + (a3*b3) + .... over the common keys only
+    dot_product = sum(
+        value * larger_vector[key]
+        for key, value in smaller_vector.items()
+        if key in larger_vector
+    )
+
+    # Dividing by the product of the magnitudes, sqrt(a) * sqrt(b) taken as a single sqrt(a * b)
+    return dot_product / math.sqrt(vector1_sq_norm * vector2_sq_norm)
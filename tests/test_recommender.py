@@ -3,14 +3,65 @@
 import sys
 sys.path.insert(0, 'src')
 
+import pytest
+
 from core.user import User
 from core.item import Item
 from core.recommender import RecommendationEngine
+from data_structures.heap import MinHeap
+from metrics.evaluation import RecommenderMetrics
+from utils.matrix_ops import (
+    transpose_matrix,
+    rotate_matrix_clockwise,
+    spiral_matrix,
+    diagonal_traverse,
+    set_missing_to_zero,
+    get_sparse_representation
+)
+
+
+@pytest.fixture(scope="module")
+def engine_with_ratings():
+    """Engine with three users, three items and a handful of ratings, shared by the read-only tests"""
+    engine = RecommendationEngine()
+    
+    # Create complete system
+    users = [
+        User("alice", preferences={"Sci-Fi": 0.9}),
+        User("bob", demographics={"age": 30}),
+        User("carol")
+    ]
+    
+    items = [
+        Item("inception", "Sci-Fi", tags=["mind-bending"]),
+        Item("titanic", "Romance", tags=["classic"]),
+        Item("matrix", "Sci-Fi", tags=["action"])
+    ]
+    
+    for user in users:
+        engine.add_user(user)
+    
+    for item in items:
+        engine.add_item(item)
+    
+    # Add ratings
+    ratings = [
+        ("alice", "inception", 5.0),
+        ("alice", "titanic", 2.0),
+        ("alice", "matrix", 4.0),
+        ("bob", "inception", 5.0),
+        ("bob", "matrix", 4.0),
+        ("carol", "titanic", 3.0)
+    ]
+    
+    for user_id, item_id, rating in ratings:
+        engine.add_rating(user_id, item_id, rating)
+    
+    return engine
 
 
 def test_user_management():
     """Test adding and retrieving users"""
-    print("Testing User Management...")
     engine = RecommendationEngine()
     
     # Add users
@@ -28,13 +79,10 @@ def test_user_management():
     assert engine.user_to_index["alice"] == 0
     assert engine.user_to_index["bob"] == 1
     assert engine.index_to_user[0] == "alice"
-    
-    print("[PASS] User Management Passed!")
 
 
 def test_item_management():
     """Test adding and retrieving items"""
-    print("Testing Item Management...")
     engine = RecommendationEngine()
     
     # Add items
@@ -52,12 +100,22 @@ def test_item_management():
     assert engine.item_to_index["inception"] == 0
     assert engine.item_to_index["titanic"] == 1
     
-    print("[PASS] Item Management Passed!")
+    # Re-adding an item replaces its content index entries instead of duplicating them
+    engine.add_item(Item("inception", "Thriller", tags=["mind-bending"]))
+    assert engine.content_based_filtering.category_index["Sci-Fi"] == []
+    assert engine.content_based_filtering.category_index["Thriller"] == ["inception"]
+    assert engine.content_based_filtering.tag_index["mind-bending"] == ["inception"]
+    
+    # Editing an item in place and re-adding it moves it out of the buckets it was indexed under
+    titanic = engine.get_item("titanic")
+    titanic.category = "Drama"
+    engine.add_item(titanic)
+    assert engine.content_based_filtering.category_index["Romance"] == []
+    assert engine.content_based_filtering.category_index["Drama"] == ["titanic"]
 
 
 def test_rating_system():
     """Test adding and retrieving ratings"""
-    print("Testing Rating System...")
     engine = RecommendationEngine()
     
     # Setup
@@ -75,38 +133,36 @@ def test_rating_system():
     assert engine.get_rating("alice", "inception") == 5.0
     assert engine.get_rating("alice", "titanic") == 2.0
     assert engine.get_rating("bob", "inception") == 5.0
+    assert engine.get_rating("bob", "titanic") is None
+    assert engine.get_rating("charlie", "inception") is None
     
-    # Test rating_store structure
-    assert "alice" in engine.rating_store
-    assert engine.rating_store["alice"]["inception"] == 5.0
+    # A zero rating is still a rating
+    engine.add_rating("bob", "titanic", 0.0)
+    assert engine.get_rating("bob", "titanic") == 0.0
     
-    print("[PASS] Rating System Passed!")
+    # Test rating_store structure
+    assert "alice" in engine.user_rating_store
+    assert engine.user_rating_store["alice"]["inception"] == 5.0
+    
+    # Rating an item that was never added fails before any store is touched
+    with pytest.raises(KeyError):
+        engine.add_rating("alice", "ghost", 5.0)
+    with pytest.raises(KeyError):
+        engine.add_ratings_batch(["bob", "alice"], ["inception", "ghost"], [1.0, 5.0])
+    assert "ghost" not in engine.item_rating_store
+    assert engine.get_rating("bob", "inception") == 5.0
 
 
-def test_matrix_operations():
+def test_matrix_operations(engine_with_ratings):
     """Test matrix and vector operations"""
-    print("Testing Matrix Operations...")
-    engine = RecommendationEngine()
-    
-    # Setup
-    engine.add_user(User("alice"))
-    engine.add_user(User("bob"))
-    engine.add_user(User("carol"))
-    engine.add_item(Item("inception", "Sci-Fi"))
-    engine.add_item(Item("titanic", "Romance"))
-    
-    # Add ratings
-    engine.add_rating("alice", "inception", 5.0)
-    engine.add_rating("alice", "titanic", 2.0)
-    engine.add_rating("bob", "inception", 5.0)
-    engine.add_rating("carol", "titanic", 3.0)
+    engine = engine_with_ratings
     
     # Test user vector
     alice_vector = engine.get_user_vector("alice")
-    assert alice_vector == [5.0, 2.0], f"Expected [5.0, 2.0], got {alice_vector}"
+    assert alice_vector == [5.0, 2.0, 4.0], f"Expected [5.0, 2.0, 4.0], got {alice_vector}"
     
-    bob_vector = engine.get_user_vector("bob")
-    assert bob_vector == [5.0, 0], f"Expected [5.0, 0], got {bob_vector}"
+    carol_vector = engine.get_user_vector("carol")
+    assert carol_vector == [0, 3.0, 0], f"Expected [0, 3.0, 0], got {carol_vector}"
     
     # Test item vector
     inception_vector = engine.get_item_vector("inception")
@@ -114,13 +170,52 @@ def test_matrix_operations():
     
     titanic_vector = engine.get_item_vector("titanic")
     assert titanic_vector == [2.0, 0, 3.0], f"Expected [2.0, 0, 3.0], got {titanic_vector}"
-    
-    print("[PASS] Matrix Operations Passed!")
+
+
+def test_matrix_utils():
+    """Test the matrix utilities on single row, single column and non-square matrices"""
+    row = [[1, 2, 3]]
+    column = [[1], [2], [3]]
+    wide = [[1, 2, 3], [4, 5, 6]]
+    tall = [[1, 2], [3, 4], [5, 6]]
+    square = [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    
+    # Transpose and clockwise rotation
+    assert transpose_matrix(row) == [[1], [2], [3]]
+    assert transpose_matrix(column) == [[1, 2, 3]]
+    assert transpose_matrix(wide) == [[1, 4], [2, 5], [3, 6]]
+    assert rotate_matrix_clockwise(row) == [[1], [2], [3]]
+    assert rotate_matrix_clockwise(column) == [[3, 2, 1]]
+    assert rotate_matrix_clockwise(wide) == [[4, 1], [5, 2], [6, 3]]
+    assert transpose_matrix([]) is None
+    assert rotate_matrix_clockwise([[]]) is None
+    
+    # Spiral order
+    assert spiral_matrix(row) == [1, 2, 3]
+    assert spiral_matrix(column) == [1, 2, 3]
+    assert spiral_matrix(wide) == [1, 2, 3, 6, 5, 4]
+    assert spiral_matrix(tall) == [1, 2, 4, 6, 5, 3]
+    assert spiral_matrix(square) == [1, 2, 3, 6, 9, 8, 7, 4, 5]
+    
+    # Diagonal order, top row diagonals first and then the right column ones
+    assert diagonal_traverse(row) == [1, 2, 3]
+    assert diagonal_traverse(column) == [1, 2, 3]
+    assert diagonal_traverse(wide) == [1, 2, 4, 3, 5, 6]
+    assert diagonal_traverse(tall) == [1, 2, 3, 4, 5, 6]
+    assert diagonal_traverse(square) == [1, 2, 4, 3, 5, 7, 6, 8, 9]
+    
+    # Flagged rows and columns are zeroed in place
+    assert set_missing_to_zero([[1, -1, 3], [4, 5, 6]]) == [[0, 0, 0], [4, 0, 6]]
+    assert set_missing_to_zero([[1, 2, 3]]) == [[1, 2, 3]]
+    assert set_missing_to_zero([[1], [-1], [3]]) == [[0], [0], [0]]
+    
+    # Only non-zero cells are kept in the sparse representation
+    assert get_sparse_representation([[0, 2, 0], [3, 0, 0]]) == {(0, 1): 2, (1, 0): 3}
+    assert get_sparse_representation(column) == {(0, 0): 1, (1, 0): 2, (2, 0): 3}
 
 
 def test_matrix_expansion():
     """Test that matrix expands correctly"""
-    print("Testing Matrix Expansion...")
     engine = RecommendationEngine()
     
     # Add first user and item
@@ -141,46 +236,11 @@ def test_matrix_expansion():
     
     # Matrix should be 2x2 filled with zeros
     assert engine.user_item_matrix == [[0, 0], [0, 0]]
-    
-    print("[PASS] Matrix Expansion Passed!")
 
 
-def test_integration():
+def test_integration(engine_with_ratings):
     """Full integration test"""
-    print("Testing Full Integration...")
-    engine = RecommendationEngine()
-    
-    # Create complete system
-    users = [
-        User("alice", preferences={"Sci-Fi": 0.9}),
-        User("bob", demographics={"age": 30}),
-        User("carol")
-    ]
-    
-    items = [
-        Item("inception", "Sci-Fi", tags=["mind-bending"]),
-        Item("titanic", "Romance", tags=["classic"]),
-        Item("matrix", "Sci-Fi", tags=["action"])
-    ]
-    
-    for user in users:
-        engine.add_user(user)
-    
-    for item in items:
-        engine.add_item(item)
-    
-    # Add ratings
-    ratings = [
-        ("alice", "inception", 5.0),
-        ("alice", "titanic", 2.0),
-        ("alice", "matrix", 4.0),
-        ("bob", "inception", 5.0),
-        ("bob", "matrix", 4.0),
-        ("carol", "titanic", 3.0)
-    ]
-    
-    for user_id, item_id, rating in ratings:
-        engine.add_rating(user_id, item_id, rating)
+    engine = engine_with_ratings
     
     # Verify complete matrix
     expected_matrix = [
@@ -195,37 +255,217 @@ def test_integration():
     # Verify item vectors
     inception_ratings = engine.get_item_vector("inception")
     assert inception_ratings == [5.0, 5.0, 0]
+
+
+def test_user_preferences_cache():
+    """Test that cached user preferences refresh after a new rating"""
+    engine = RecommendationEngine()
+    
+    # Setup
+    engine.add_user(User("alice"))
+    engine.add_item(Item("inception", "Sci-Fi", tags=["mind-bending"]))
+    engine.add_item(Item("titanic", "Romance"))
+    engine.add_rating("alice", "inception", 5.0)
+    
+    # First extraction is cached and reused
+    preferences = engine.content_based_filtering.extract_user_preferences("alice")
+    assert preferences == {"Sci-Fi": 1.0, "mind-bending": 1.0}
+    assert engine.content_based_filtering.extract_user_preferences("alice") is preferences
+    
+    # A new high rating invalidates the cache (titanic has no tags)
+    engine.add_rating("alice", "titanic", 4.5)
+    preferences = engine.content_based_filtering.extract_user_preferences("alice")
+    assert preferences == {"Sci-Fi": 0.5, "mind-bending": 0.5, "Romance": 0.5}
+    
+    # Re-adding a rated item under a new category refreshes the cached preferences too
+    engine.add_item(Item("inception", "Drama", tags=["mind-bending"]))
+    preferences = engine.content_based_filtering.extract_user_preferences("alice")
+    assert preferences == {"Drama": 0.5, "mind-bending": 0.5, "Romance": 0.5}
+
+
+def test_similarity_after_rerating():
+    """Test that cosine similarity stays correct when a rating is overwritten"""
+    engine = RecommendationEngine()
+    
+    # Setup
+    engine.add_user(User("alice"))
+    engine.add_user(User("bob"))
+    engine.add_item(Item("inception", "Sci-Fi"))
+    engine.add_item(Item("titanic", "Romance"))
+    engine.add_rating("alice", "inception", 5.0)
+    engine.add_rating("alice", "titanic", 1.0)
+    engine.add_rating("bob", "inception", 4.0)
+    
+    # Overwriting alice's titanic rating must update her magnitude as well
+    engine.add_rating("alice", "titanic", 0.0)
+    assert abs(engine.get_user_similarity("alice", "bob") - 1.0) < 1e-9
+    assert engine.get_item_similarity("inception", "titanic") == 0.0
+
+
+def test_item_similarity_row():
+    """Test that the batched similarity row matches the pairwise similarities"""
+    engine = RecommendationEngine()
+    
+    # Setup
+    for user_id in ["alice", "bob", "carol"]:
+        engine.add_user(User(user_id))
+    for item_id in ["inception", "titanic", "matrix", "up"]:
+        engine.add_item(Item(item_id, "Movie"))
+    engine.add_rating("alice", "inception", 5.0)
+    engine.add_rating("alice", "titanic", 2.0)
+    engine.add_rating("bob", "inception", 4.0)
+    engine.add_rating("bob", "matrix", 5.0)
+    engine.add_rating("carol", "up", 3.0)
+    
+    # Co-rated items match the pairwise cosine, items without a shared rater are left out
+    similarity_row = engine.get_item_similarity_row("inception")
+    assert set(similarity_row) == {"titanic", "matrix"}
+    for other_item_id, similarity in similarity_row.items():
+        assert abs(similarity - engine.get_item_similarity("inception", other_item_id)) < 1e-9
+    
+    # The cached neighbours match the computed ones and are dropped on the next rating
+    expected_neighbours = engine.get_top_k_similar_items_with_scores("inception", k=2)
+    engine.build_item_similarity_cache(top_k_per_item=5)
+    assert engine.get_top_k_similar_items_with_scores("inception", k=2) == expected_neighbours
+    engine.add_rating("carol", "inception", 1.0)
+    assert engine.item_similarity_cache == {}
+
+
+def test_user_similarity_row():
+    """Test that the user similarity row and top k similar users match the pairwise similarities"""
+    engine = RecommendationEngine()
+    
+    # Setup
+    for user_id in ["alice", "bob", "carol", "dave"]:
+        engine.add_user(User(user_id))
+    for item_id in ["inception", "titanic", "matrix", "up"]:
+        engine.add_item(Item(item_id, "Movie"))
+    engine.add_rating("alice", "inception", 5.0)
+    engine.add_rating("alice", "titanic", 2.0)
+    engine.add_rating("bob", "inception", 4.0)
+    engine.add_rating("carol", "titanic", 5.0)
+    engine.add_rating("dave", "matrix", 3.0)
+    
+    # Users sharing a rated item match the pairwise cosine, users without one are left out
+    similarity_row = engine.get_user_similarity_row("alice")
+    assert set(similarity_row) == {"bob", "carol"}
+    for other_user_id, similarity in similarity_row.items():
+        assert abs(similarity - engine.get_user_similarity("alice", other_user_id)) < 1e-9
+    assert engine.get_user_similarity_row("eve") == {}
+    
+    # Top k similar users come back best first, with and without their scores
+    assert engine.get_top_k_similar_users_with_scores("alice", k=1) == [("bob", similarity_row["bob"])]
+    assert engine.get_top_k_similar_users("alice", k=5) == ["bob", "carol"]
+    
+    # An item that was added but never rated has a popularity of 0
+    assert engine.get_item_popularity("up") == 0
+    assert engine.get_item_popularity("inception") == 2
+
+
+def test_add_ratings_batch():
+    """Test that batch ingestion matches rating one at a time"""
+    single_engine = RecommendationEngine()
+    batch_engine = RecommendationEngine()
     
-    print("[PASS] Integration Test Passed!")
-
-
-def run_all_tests():
-    """Run all tests"""
-    print("=" * 50)
-    print("Running Unit Tests")
-    print("=" * 50)
-    
-    try:
-        test_user_management()
-        test_item_management()
-        test_rating_system()
-        test_matrix_expansion()
-        test_matrix_operations()
-        test_integration()
-        
-        print("\n" + "=" * 50)
-        print("[SUCCESS] ALL TESTS PASSED!")
-        print("=" * 50)
-        
-    except AssertionError as e:
-        print(f"\n[FAIL] TEST FAILED: {e}")
-        import traceback
-        traceback.print_exc()
-    except Exception as e:
-        print(f"\n[FAIL] ERROR: {e}")
-        import traceback
-        traceback.print_exc()
-
-
-if __name__ == "__main__":
-    run_all_tests()
\ No newline at end of file
+    # Setup
+    for engine in [single_engine, batch_engine]:
+        engine.add_user(User("alice"))
+        engine.add_user(User("bob"))
+        engine.add_item(Item("inception", "Sci-Fi"))
+        engine.add_item(Item("titanic", "Romance"))
+    
+    # Same ratings, including an overwrite, through both ingestion paths
+    user_ids = ["alice", "alice", "bob", "alice"]
+    item_ids = ["inception", "titanic", "inception", "titanic"]
+    ratings = [5.0, 2.0, 4.0, 3.0]
+    for user_id, item_id, rating in zip(user_ids, item_ids, ratings):
+        single_engine.add_rating(user_id, item_id, rating)
+    batch_engine.add_ratings_batch(user_ids, item_ids, ratings)
+    
+    assert batch_engine.user_rating_store == single_engine.user_rating_store
+    assert batch_engine.item_rating_store == single_engine.item_rating_store
+    assert batch_engine.user_item_matrix == single_engine.user_item_matrix
+    assert batch_engine.user_sq_norm == single_engine.user_sq_norm
+    assert batch_engine.item_sq_norm == single_engine.item_sq_norm
+    assert batch_engine.item_rating_sum == single_engine.item_rating_sum
+    assert batch_engine.get_average_rating_for_item("inception") == 4.5
+    assert batch_engine.user_high_rated_items == single_engine.user_high_rated_items
+    assert batch_engine.user_high_rated_items == {"alice": {"inception": 5.0}, "bob": {"inception": 4.0}}
+
+
+def test_recommend_with_filters():
+    """Test that filtered recommendations keep searching past the first candidates until N pass"""
+    engine = RecommendationEngine()
+    
+    # Setup: alice liked one space Sci-Fi film, seven more rank above the only space Drama
+    engine.add_user(User("alice"))
+    engine.add_item(Item("seed", "Sci-Fi", tags=["space"]))
+    for index in range(7):
+        engine.add_item(Item(f"scifi{index}", "Sci-Fi", tags=["space"]))
+    engine.add_item(Item("drama", "Drama", tags=["space"]))
+    engine.add_item(Item("romance", "Romance"))
+    engine.add_rating("alice", "seed", 5.0)
+    
+    # The old top 3N pool held only Sci-Fi items, so excluding Sci-Fi used to come back empty
+    assert "drama" not in engine.hybrid_recommender.get_combined_scores("alice", n=3)
+    assert engine.recommend_with_filters("alice", n=1, exclude_categories=["Sci-Fi"]) == ["drama"]
+    
+    # Without filters the result matches the hybrid ranking and never repeats a rated item
+    assert engine.recommend_with_filters("alice", n=3) == engine.hybrid_recommender.get_hybrid_recommendations("alice", n=3)
+    assert "seed" not in engine.recommend_with_filters("alice", n=10)
+    
+    # Unrated items have no average, so a minimum rating leaves nothing and the search stops
+    assert engine.recommend_with_filters("alice", n=2, min_rating=3.0) == []
+
+
+def test_min_heap():
+    """Test that the min heap pops every pushed element in ascending order"""
+    heap = MinHeap()
+    
+    # Push values in an order that needs swaps on the way up
+    values = [5, 3, 8, 1, 9, 2, 7]
+    for value in values:
+        heap.push(value)
+    assert heap.peek() == 1
+    
+    # Popping must return each value exactly once, smallest first
+    popped = []
+    while len(heap) > 0:
+        popped.append(heap.pop())
+    assert popped == sorted(values)
+
+
+def test_diversity():
+    """Test that diversity is the complement of the average pair-wise similarity"""
+    engine = RecommendationEngine()
+    
+    # Setup: inception and matrix share a rater with identical ratings, titanic shares nobody
+    engine.add_user(User("alice"))
+    engine.add_user(User("bob"))
+    for item_id in ["inception", "matrix", "titanic"]:
+        engine.add_item(Item(item_id, "Movie"))
+    engine.add_rating("alice", "inception", 5.0)
+    engine.add_rating("alice", "matrix", 5.0)
+    engine.add_rating("bob", "titanic", 3.0)
+    
+    assert abs(RecommenderMetrics.calculate_diversity(["inception", "matrix"], engine)) < 1e-9
+    assert abs(RecommenderMetrics.calculate_diversity(["inception", "matrix", "titanic"], engine) - (2 / 3)) < 1e-9
+
+
+def test_evaluate_batch():
+    """Test that batch evaluation averages precision and recall over users"""
+    recommendations_per_user = [["inception", "titanic"], ["matrix", "up"]]
+    relevant_items_per_user = [["inception"], ["avatar"]]
+    
+    metrics = RecommenderMetrics.evaluate_batch(recommendations_per_user, relevant_items_per_user, k=2)
+    assert metrics == {"precision": 0.25, "recall": 0.5}
+    assert RecommenderMetrics.calculate_precision_at_k_batch(recommendations_per_user, relevant_items_per_user, k=2) == [0.5, 0.0]
+    
+    # Mismatched per-user lists are rejected instead of silently truncated
+    with pytest.raises(ValueError):
+        RecommenderMetrics.calculate_precision_at_k_batch(recommendations_per_user, relevant_items_per_user[:1], k=2)
+    with pytest.raises(ValueError):
+        RecommenderMetrics.evaluate_batch(recommendations_per_user, relevant_items_per_user[:1], k=2)
+    
+    # Recall with no relevant items is 0 rather than a division error
+    assert RecommenderMetrics.calculate_recall_at_k(["inception"], [], k=1) == 0.0